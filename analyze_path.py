@@ -17,7 +17,7 @@ async def main() -> None:
 		sys.exit(1)
 	path = sys.argv[1]
 	result = await server.analyze_path_async(path)
-	print(result)
+	print(server._json_dumps(result))
 
 if __name__ == "__main__":
 	asyncio.run(main())
@@ -19,17 +19,38 @@ More information and examples at https://github.com/modelcontextprotocol/create-
 
 
 import os
+import stat as stat_module
+import functools
 import mimetypes
+import mmap
+import re
 import types
 import logging
 import ipaddress
 import asyncio
+import atexit
+import multiprocessing
+import binascii
+import concurrent.futures
 from urllib.parse import urlparse
 import traceback
 import httpx
 from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field
 
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        """Serialize an analysis result to JSON (orjson, C-backed)."""
+        return orjson.dumps(obj).decode()
+except ImportError:
+    import json
+
+    def _json_dumps(obj) -> str:
+        """Serialize an analysis result to JSON (stdlib fallback)."""
+        return json.dumps(obj)
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,107 +63,204 @@ print("[mcp-file-url-analyzer] FastMCP and dependencies imported successfully.")
 
 mcp = FastMCP("mcp-file-url-analyzer")
 
+# --- Shared HTTP client (connection pooling / keep-alive) ---
+
+_client: httpx.AsyncClient | None = None
+
+
+def _get_http_timeout() -> float:
+    """Return the HTTP request timeout in seconds (HTTP_TIMEOUT env)."""
+    try:
+        return float(os.environ.get("HTTP_TIMEOUT", 10))
+    except (ValueError, TypeError):
+        return 10.0
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared httpx.AsyncClient, creating it lazily on first use.
+
+    Reusing one client keeps connections alive between analyses, avoiding
+    a fresh TCP+TLS handshake per URL.
+    """
+    global _client  # pylint: disable=global-statement
+    if _client is None:
+        limits = httpx.Limits(
+            max_keepalive_connections=32,
+            max_connections=64,
+            keepalive_expiry=300,
+        )
+        timeout = _get_http_timeout()
+        # Advertise compressed encodings; httpx decodes transparently and
+        # text bodies typically shrink 2-4x on the wire.
+        headers = {"Accept-Encoding": "gzip, br"}
+        # An explicit transport adds one transparent retry on connection
+        # failures, so a dropped keep-alive connection doesn't surface as
+        # an analysis error.
+        try:
+            transport = httpx.AsyncHTTPTransport(
+                retries=1, http2=True, limits=limits)
+        except ImportError:
+            # The optional 'h2' package is missing; fall back to HTTP/1.1.
+            transport = httpx.AsyncHTTPTransport(retries=1, limits=limits)
+        _client = httpx.AsyncClient(
+            transport=transport, timeout=timeout, headers=headers)
+    return _client
+
+
+def _close_client() -> None:
+    """Close the shared HTTP client at shutdown, if it was created."""
+    global _client  # pylint: disable=global-statement
+    if _client is not None:
+        asyncio.run(_client.aclose())
+        _client = None
+
+
+atexit.register(_close_client)
+
+# HTTP validator cache: url -> (etag, last-modified, cached result). Lets
+# repeated analyses of the same URL revalidate with a conditional request
+# and skip the body transfer on 304 Not Modified.
+_url_cache: dict[str, tuple[str | None, str | None, dict]] = {}
+
+
+def _conditional_headers(url: str) -> dict[str, str]:
+    """Build If-None-Match/If-Modified-Since headers from the cache."""
+    headers: dict[str, str] = {}
+    cached = _url_cache.get(url)
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def _cache_url_result(url: str, headers, result: dict) -> None:
+    """Remember the result for URLs that expose HTTP validators."""
+    etag = headers.get("etag")
+    last_modified = headers.get("last-modified")
+    if etag or last_modified:
+        _url_cache[url] = (etag, last_modified, result)
+
 # --- Pydantic models for tool input/output ---
 
 
 @mcp.tool()
-def analyze_path(args: dict) -> dict:
+async def analyze_path(args: dict) -> dict:
     """Analyze a local file or directory (text or binary)."""
-    path = args["path"]
-    if not os.path.exists(path):
-        return {"error": f"Path not found: {path}"}
-    if os.path.isfile(path):
-        return _analyze_file(path)
-    if os.path.isdir(path):
-        results = {}
-        for root, _, files in os.walk(path):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                results[file_path] = _analyze_file(file_path)
-        return {"files": results}
-    return {"error": "Path is neither file nor directory"}
+    return await _analyze_path(args["path"])
 
 # --- SSRF protection: global, reusable and tested ---
+
+_LOCAL_HOSTS = frozenset({"localhost", "127.0.0.1", "::1"})
+
+# Fast path for the common scheme://host[:port]/... shape. Anything with
+# userinfo, IPv6 brackets or an odd authority fails the match and falls
+# back to urlparse, so the extracted host can never be spoofed via '@'.
+_HOST_RE = re.compile(
+    r"^[a-zA-Z][a-zA-Z0-9+.\-]*://([^/?#@\[\]:]+)(?::\d*)?(?=[/?#]|$)")
+
+# Shape gate: reject anything that isn't scheme://non-whitespace before
+# spending a parse on it.
+_URL_SHAPE_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.\-]*://\S+$")
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_safe_host(hostname: str) -> bool:
+    """Classify a hostname once; repeated URL checks hit the cache."""
+    if hostname in _LOCAL_HOSTS:
+        return False
+    try:
+        ip = ipaddress.ip_address(hostname)
+    except ValueError:
+        return True
+    # is_global covers private, loopback, reserved and link-local ranges
+    # in one attribute access.
+    return ip.is_global
+
+
+@functools.lru_cache(maxsize=4096)
 def is_safe_url(url: str) -> bool:
-    """Return True if the URL is considered safe for remote 
-    access (no localhost, no private IPs)."""
+    """Return True if the URL is considered safe for remote
+    access (no localhost, no private IPs).
+
+    The check is pure (no DNS lookups), so repeated analyses of the same
+    URL can skip the parse entirely via the cache.
+    """
+    if not _URL_SHAPE_RE.match(url):
+        return False
     try:
-        parsed = urlparse(url)
-        hostname = parsed.hostname
+        match = _HOST_RE.match(url)
+        if match:
+            hostname = match.group(1).lower()
+        else:
+            hostname = urlparse(url).hostname
         if not hostname:
             return False
-        if hostname in ("localhost", "127.0.0.1", "::1"):
-            return False
-        try:
-            ip = ipaddress.ip_address(hostname)
-            if ip.is_private or ip.is_loopback or ip.is_reserved:
-                return False
-        except ValueError:
-            pass
-        return True
+        return _is_safe_host(hostname)
     except Exception as exc:  # pylint: disable=broad-exception-caught
         logger.warning("is_safe_url: Exception for %s: %s", url, exc)
         return False
 
 @mcp.tool()
-def analyze_url(args: dict) -> dict:
+async def analyze_url(args: dict) -> dict:
     """Download and analyze the content of a URL (text or binary)."""
-    url = args["url"]
-    if not is_safe_url(url):
-        logger.warning("Blocked unsafe URL: %s", url)
-        return {"error": "URL not allowed for security reasons."}
+    return await _analyze_url(args["url"])
+
+# Directory-scan files above this size have their counting loops run in a
+# process pool so the scans use multiple cores instead of serializing on
+# the GIL.
+_PROCESS_THRESHOLD = 1 << 20
+
+# Bounded thread pool for file I/O. Sized to mask I/O waits without the
+# context-switch overhead of asyncio's unbounded-ish default executor.
+_io_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 4) * 4),
+    thread_name_prefix="mcp-io")
+atexit.register(_io_executor.shutdown)
+
+_process_pool: concurrent.futures.ProcessPoolExecutor | None = None
+
 
-    max_url_size = 5 * 1024 * 1024
+def _get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Return the shared process pool, creating it lazily on first use."""
+    global _process_pool  # pylint: disable=global-statement
+    if _process_pool is None:
+        # The server is multi-threaded (I/O executor, httpx) by the time
+        # the pool is first needed, so plain fork() risks deadlocks in the
+        # children; forkserver forks from a clean single-threaded helper.
+        _process_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("forkserver"))
+        atexit.register(_process_pool.shutdown)
+    return _process_pool
 
-    async def fetch():
+
+def _iter_files(root: str):
+    """Yield os.DirEntry objects for every regular file under root.
+
+    scandir reuses the directory-listing data for the is_dir/is_file
+    checks, avoiding the extra stat syscall per entry that os.walk pays.
+    Unreadable directories are skipped like os.walk's default, and the
+    explicit stack keeps arbitrarily deep trees from recursing.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(url, follow_redirects=True, timeout=10)
-                content_length = int(resp.headers.get("content-length", 0))
-                if content_length > max_url_size:
-                    return {"error": (
-                        f"Remote file too large (>"
-                        f"{max_url_size // (1024*1024)} MB)"
-                    )}
-                content_bytes = await resp.aread()
-                if len(content_bytes) > max_url_size:
-                    return {"error": (
-                        "Downloaded file too large (>"
-                        f"{max_url_size // (1024*1024)} MB)"
-                    )}
-                mime, _ = mimetypes.guess_type(url)
-                content_type = resp.headers.get("content-type", mime or "unknown")
-                if "text" in content_type:
+            with os.scandir(current) as it:
+                for entry in it:
                     try:
-                        text = content_bytes.decode(errors="replace")
-                    except UnicodeDecodeError as exc:
-                        return {
-                            "error": f"Could not decode content as text: {exc}",
-                            "content_type": content_type,
-                            "size": len(content_bytes),
-                        }
-                    return {
-                        "type": "text",
-                        "content_type": content_type,
-                        "lines": len(text.splitlines()),
-                        "words": len(text.split()),
-                        "size": len(content_bytes),
-                        "preview": text[:500],
-                    }
-                return {
-                    "type": "binary",
-                    "content_type": content_type,
-                    "size": len(content_bytes),
-                    "preview_bytes": content_bytes[:32].hex(),
-                }
-        except Exception as exc:  # pylint: disable=broad-exception-caught
-            logger.error("analyze_url: Exception fetching %s: %s", url, exc)
-            return {"error": f"Failed to fetch or analyze URL: {exc}"}
-    try:
-        asyncio.get_running_loop()
-        return fetch()
-    except RuntimeError:
-        return asyncio.run(fetch())
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
 
 def _get_max_file_size():
     try:
@@ -150,38 +268,307 @@ def _get_max_file_size():
     except (ValueError, TypeError):
         return 5 * 1024 * 1024
 
-def _analyze_file(path: str) -> dict:
-    """Analyze a local file. Returns basic info about the file."""
-    max_file_size = _get_max_file_size()
-    mime, _ = mimetypes.guess_type(path)
+# A content-length header longer than this many digits is over the URL
+# size limit without needing an int() parse.
+# URL downloads are capped at a fixed 5 MB; precompute the limit and its
+# error dicts so the rejection paths allocate nothing per call.
+_MAX_URL_SIZE = 5 * 1024 * 1024
+_MAX_CL_DIGITS = len(str(_MAX_URL_SIZE))
+_ERR_REMOTE_TOO_LARGE = {
+    "error": f"Remote file too large (>{_MAX_URL_SIZE // (1024 * 1024)} MB)",
+}
+_ERR_DOWNLOAD_TOO_LARGE = {
+    "error": (
+        f"Downloaded file too large (>{_MAX_URL_SIZE // (1024 * 1024)} MB)"
+    ),
+}
+
+# Initialize the MIME database once at import so the lazy first-use cost
+# is not paid inside a tool call.
+mimetypes.init()
+
+
+@functools.lru_cache(maxsize=512)
+def _mime_for_ext(ext: str) -> str | None:
+    """Return the MIME type for a lowercased extension, memoized."""
+    return mimetypes.guess_type("x" + ext)[0]
+
+
+# Prime the cache for the extensions that dominate typical trees, so the
+# common case never pays a cold guess_type table walk inside a tool call.
+for _ext in (".txt", ".json", ".html", ".css", ".js", ".md", ".py",
+             ".csv", ".log", ".xml", ".yaml", ".yml", ".ini", ".toml",
+             ".png", ".jpg", ".gif", ".pdf", ".zip", ".bin", ""):
+    _mime_for_ext(_ext)
+del _ext
+
+
+# Files up to this size are read in full with a single preallocated
+# buffer; anything larger goes through the read-only mmap path. Override
+# with the MCP_FUA_MMAP_THRESHOLD environment variable.
+_DEFAULT_MMAP_THRESHOLD = 1 << 16
+
+# Slice size used when scanning an mmap'd file for line/word counts.
+_SCAN_CHUNK = 1 << 20
+
+
+def _mmap_threshold() -> int:
+    """Return the small/large file cutoff, honoring the env override."""
     try:
-        size = os.path.getsize(path)
-        if size > max_file_size:
-            return {"error": (
-                f"File too large (>"
-                f"{max_file_size // (1024*1024)} MB)"
-            )}
-        with open(path, mode="rb") as file_obj:
-            content = file_obj.read()
-        if mime and "text" in mime:
-            text = content.decode(errors="replace")
+        return int(os.environ.get(
+            "MCP_FUA_MMAP_THRESHOLD", _DEFAULT_MMAP_THRESHOLD))
+    except (ValueError, TypeError):
+        return _DEFAULT_MMAP_THRESHOLD
+
+# Precompiled word matcher used to count words on raw bytes.
+_WORD_RE = re.compile(rb"\S+")
+
+try:
+    # Optional: with numpy installed, word counting on big buffers becomes
+    # a handful of vectorized mask operations instead of a regex scan.
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# Below this size the numpy call overhead outweighs the vectorized scan.
+_NUMPY_MIN_SIZE = 1 << 12
+
+
+def _count_words_np(content: bytes | bytearray) -> int:
+    """Count words with numpy by finding whitespace->non-whitespace edges.
+
+    Matches the byte-regex word definition: the whitespace set is exactly
+    space, tab, newline, carriage return, form feed and vertical tab.
+    """
+    arr = _np.frombuffer(content, dtype=_np.uint8)
+    ws = (arr == 32) | ((arr >= 9) & (arr <= 13))
+    nonws = ~ws
+    return int(nonws[0]) + int((nonws[1:] & ws[:-1]).sum())
+
+
+# Bytes that essentially never occur in text: C0 controls minus
+# tab/newline/vertical-tab/form-feed/carriage-return.
+_BINARY_BYTES = bytes(b for b in range(32) if b not in (9, 10, 11, 12, 13))
+if _np is not None:
+    _BINARY_LUT = _np.zeros(256, dtype=bool)
+    _BINARY_LUT[list(_BINARY_BYTES)] = True
+
+# How much of the head is sniffed, and the control-byte ratio above which
+# content is deemed binary.
+_SNIFF_LIMIT = 1 << 16
+_BINARY_RATIO = 0.1
+
+
+def _looks_text(head: bytes) -> bool:
+    """Sniff whether content with no known MIME type looks like text."""
+    if not head:
+        return False
+    if _np is not None:
+        arr = _np.frombuffer(head, dtype=_np.uint8)
+        return float(_BINARY_LUT[arr].mean()) <= _BINARY_RATIO
+    # bytes.translate with a delete table is a C loop; the length drop is
+    # the number of control bytes present.
+    stripped = head.translate(None, delete=_BINARY_BYTES)
+    return (len(head) - len(stripped)) / len(head) <= _BINARY_RATIO
+
+
+try:
+    # Optional: libmagic's signature tables recognize far more formats
+    # than the ratio heuristic. One instance, loaded once at import.
+    import magic
+    _MAGIC = magic.Magic(mime=True)
+except (ImportError, OSError):
+    _MAGIC = None
+
+
+def _is_text(mime: str | None, head: bytes) -> bool:
+    """Classify as text from the MIME type, sniffing bytes if unknown."""
+    if mime is not None:
+        return "text" in mime
+    if _MAGIC is not None:
+        try:
+            return "text" in _MAGIC.from_buffer(head)
+        except Exception:  # pylint: disable=broad-exception-caught
+            pass
+    return _looks_text(head)
+
+
+def _count_words(content: bytes | bytearray) -> int:
+    """Count words on raw bytes, using numpy for large buffers."""
+    if _np is not None and len(content) >= _NUMPY_MIN_SIZE:
+        return _count_words_np(content)
+    return sum(1 for _ in _WORD_RE.finditer(content))
+
+
+def _count_lines_words(content: bytes | bytearray) -> tuple[int, int]:
+    """Count lines and words on raw bytes without decoding or tokenizing.
+
+    bytes.count and the precompiled word matcher run as C loops, avoiding
+    the full str copy plus the substring lists that splitlines()/split()
+    would allocate. Large buffers use the numpy counter when available.
+    """
+    lines = content.count(b"\n")
+    if content and not content.endswith(b"\n"):
+        lines += 1
+    return lines, _count_words(content)
+
+
+def _analyze_mmap(path: str, size: int, mime: str | None) -> dict:
+    """Analyze a large file through a read-only mmap, without copying it.
+
+    Line and word counts are computed directly on the mapped bytes; only
+    the preview slice is decoded.
+    """
+    with open(path, mode="rb") as file_obj, mmap.mmap(
+        file_obj.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        if _is_text(mime, mm[:_SNIFF_LIMIT]):
+            lines = 0
+            words = 0
+            prev_ends_in_word = False
+            for start in range(0, size, _SCAN_CHUNK):
+                chunk = mm[start:start + _SCAN_CHUNK]
+                lines += chunk.count(b"\n")
+                words += _count_words(chunk)
+                # A word spanning the chunk boundary was counted twice.
+                if prev_ends_in_word and not chunk[:1].isspace():
+                    words -= 1
+                prev_ends_in_word = not chunk[-1:].isspace()
+            if mm[size - 1:size] != b"\n":
+                lines += 1
+            preview = mm[:2048].decode(errors="replace")[:500]
             return {
                 "type": "text",
                 "mime": mime,
-                "lines": len(text.splitlines()),
-                "words": len(text.split()),
-                "size": len(content),
-                "preview": text[:500],
+                "lines": lines,
+                "words": words,
+                "size": size,
+                "preview": preview,
             }
         return {
             "type": "binary",
             "mime": mime or "unknown",
+            "size": size,
+            "preview_bytes": mm[:32].hex(),
+        }
+
+
+def _read_file(path: str, size: int) -> bytearray:
+    """Read a file of known size into one preallocated buffer via os.read.
+
+    A single allocation of exactly `size` bytes plus raw os.read calls into
+    a memoryview avoids the per-chunk copies of a buffered file object.
+    """
+    buf = bytearray(size)
+    view = memoryview(buf)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        offset = 0
+        while offset < size:
+            chunk = os.read(fd, size - offset)
+            if not chunk:
+                break
+            view[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+    finally:
+        os.close(fd)
+    if offset < size:
+        del view
+        del buf[offset:]
+    return buf
+
+
+def _summarize_content(mime: str | None, content: bytes | bytearray) -> dict:
+    """Build the analysis dict for file content already read into memory."""
+    if _is_text(mime, bytes(memoryview(content)[:_SNIFF_LIMIT])):
+        lines, words = _count_lines_words(content)
+        return {
+            "type": "text",
+            "mime": mime,
+            "lines": lines,
+            "words": words,
             "size": len(content),
-            "preview_bytes": content[:32].hex(),
+            "preview": content[:2048].decode(errors="replace")[:500],
         }
+    return {
+        "type": "binary",
+        "mime": mime or "unknown",
+        "size": len(content),
+        "preview_bytes": binascii.hexlify(
+            memoryview(content)[:32]).decode(),
+    }
+
+
+def _analyze_file(path: str, size: int | None = None) -> dict:
+    """Analyze a local file. Returns basic info about the file.
+
+    `size` may be passed from a cached DirEntry.stat() to skip a second
+    stat syscall.
+    """
+    max_file_size = _get_max_file_size()
+    mime = _mime_for_ext(os.path.splitext(path)[1].lower())
+    try:
+        if size is None:
+            size = os.path.getsize(path)
+        if size > max_file_size:
+            return {"error": (
+                f"File too large (>"
+                f"{max_file_size // (1024*1024)} MB)"
+            )}
+        if size > _mmap_threshold():
+            return _analyze_mmap(path, size, mime)
+        content = _read_file(path, size)
+        return _summarize_content(mime, content)
+    except (OSError, UnicodeDecodeError) as exc:
+        return {"error": f"Error reading file: {exc}"}
+
+
+# Small files from a directory scan are analyzed in batches of this many
+# per executor call, amortizing the thread-pool handoff across the batch.
+_CHUNK_FILES = 64
+
+
+def _analyze_chunk(entries: list[tuple[str, int]]) -> dict[str, dict]:
+    """Analyze a batch of (path, size) pairs in one executor hop."""
+    return {path: _analyze_file(path, size) for path, size in entries}
+
+
+async def _analyze_file_async(path: str, size: int | None = None) -> dict:
+    """Analyze a local file without blocking the event loop.
+
+    The read happens in the default executor so concurrent analyses can
+    overlap their I/O waits. `size` may be passed from a cached
+    DirEntry.stat() to skip a second stat syscall.
+    """
+    max_file_size = _get_max_file_size()
+    mime = _mime_for_ext(os.path.splitext(path)[1].lower())
+    try:
+        if size is None:
+            size = os.path.getsize(path)
+        if size > max_file_size:
+            return {"error": (
+                f"File too large (>"
+                f"{max_file_size // (1024*1024)} MB)"
+            )}
+        loop = asyncio.get_running_loop()
+        if size > _mmap_threshold():
+            return await loop.run_in_executor(
+                _io_executor, _analyze_mmap, path, size, mime)
+        content = await loop.run_in_executor(
+            _io_executor, _read_file, path, size)
+        return _summarize_content(mime, content)
     except (OSError, UnicodeDecodeError) as exc:
         return {"error": f"Error reading file: {exc}"}
 
+try:
+    # Optional: uvloop's libuv-based loop has lower per-callback and socket
+    # I/O overhead than the default selector loop. Absent (e.g. Windows),
+    # the stdlib loop is used unchanged.
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 if __name__ == "__main__":
     print("[mcp-file-url-analyzer] MCP server starting... (Python)")
     try:
@@ -196,29 +583,46 @@ async def handle_list_resources():
     """Return an empty list (no resources supported)."""
     return []
 
+async def _call_analyze_path(args):
+    """Validate args and run the analyze-path tool."""
+    if not args or 'path' not in args:
+        raise ValueError('Missing path')
+    return await _analyze_path(args['path'])
+
+async def _call_analyze_url(args):
+    """Validate args and run the analyze-url tool."""
+    if not args or 'url' not in args:
+        raise ValueError('Missing url')
+    return await _analyze_url(args['url'])
+
+# O(1) name-to-handler dispatch; each entry is a stable call site.
+_TOOL_HANDLERS = {
+    'analyze-path': _call_analyze_path,
+    'analyze-url': _call_analyze_url,
+}
+
 async def handle_call_tool(tool_name, args):
     """Call the appropriate tool handler based on tool_name."""
-    if tool_name == 'analyze-path':
-        if not args or 'path' not in args:
-            raise ValueError('Missing path')
-        return await _analyze_path(args['path'])
-    if tool_name == 'analyze-url':
-        if not args or 'url' not in args:
-            raise ValueError('Missing url')
-        return await _analyze_url(args['url'])
-    raise ValueError('Unknown tool')
+    handler = _TOOL_HANDLERS.get(tool_name)
+    if handler is None:
+        raise ValueError('Unknown tool')
+    return await handler(args)
 
 async def handle_read_resource(uri):
     """Raise error (no resources supported)."""
     raise ValueError('Unsupported URI')
 
+# The tool list never changes at runtime; build it once and hand back the
+# same reference instead of allocating fresh objects per call.
+_TOOLS = [
+    types.SimpleNamespace(name='analyze-path'),
+    types.SimpleNamespace(name='analyze-url'),
+]
+
+
 async def handle_list_tools():
     """Return the list of available tools."""
-    tool = types.SimpleNamespace
-    return [
-        tool(name='analyze-path'),
-        tool(name='analyze-url'),
-    ]
+    return _TOOLS
 
 async def handle_get_prompt(prompt_name, args):
     """Raise error (no prompts implemented)."""
@@ -229,66 +633,127 @@ async def handle_get_prompt(prompt_name, args):
     raise NotImplementedError('No prompts implemented')
 
 async def _analyze_path(path: str):
-    """Analyze a file or directory asynchronously for testing."""
-    if not os.path.exists(path):
+    """Analyze a file or directory. Single shared implementation behind
+    the FastMCP tool and the async wrappers."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        try:
+            # One lstat tells a broken symlink apart from a missing path.
+            os.lstat(path)
+        except OSError:
+            return {"error": f"Path not found: {path}"}
+        return {"error": "Path is neither file nor directory"}
+    except OSError:
         return {"error": f"Path not found: {path}"}
-    if os.path.isfile(path):
-        return _analyze_file(path)
-    if os.path.isdir(path):
-        results = {}
-        for root, _, files in os.walk(path):
-            for file_name in files:
-                file_path = os.path.join(root, file_name)
-                results[file_path] = _analyze_file(file_path)
+    if stat_module.S_ISREG(st.st_mode):
+        return await _analyze_file_async(path, st.st_size)
+    if stat_module.S_ISDIR(st.st_mode):
+        loop = asyncio.get_running_loop()
+        # Enumerating a large tree is blocking syscall work; run it in the
+        # executor so the event loop stays responsive while we walk.
+        def _collect() -> tuple[list[tuple[str, int]], dict[str, dict]]:
+            entries: list[tuple[str, int]] = []
+            errors: dict[str, dict] = {}
+            for entry in _iter_files(path):
+                try:
+                    entries.append(
+                        (entry.path,
+                         entry.stat(follow_symlinks=False).st_size))
+                except OSError as exc:
+                    # A file can vanish between listing and stat; report
+                    # it per-file instead of failing the whole scan.
+                    errors[entry.path] = {
+                        "error": f"Error reading file: {exc}"}
+            return entries, errors
+
+        entries, results = await loop.run_in_executor(
+            _io_executor, _collect)
+        sem = asyncio.Semaphore(32)
+
+        async def analyze_large(file_path: str, size: int):
+            async with sem:
+                # Large text scans are CPU-bound; fan out to a worker
+                # process instead of holding the GIL.
+                return file_path, await loop.run_in_executor(
+                    _get_process_pool(), _analyze_file, file_path, size)
+
+        small = [e for e in entries if e[1] <= _PROCESS_THRESHOLD]
+        large = [e for e in entries if e[1] > _PROCESS_THRESHOLD]
+        for part in await asyncio.gather(*(
+            loop.run_in_executor(
+                _io_executor, _analyze_chunk, small[i:i + _CHUNK_FILES])
+            for i in range(0, len(small), _CHUNK_FILES)
+        )):
+            results.update(part)
+        results.update(await asyncio.gather(
+            *(analyze_large(p, s) for p, s in large)))
         return {"files": results}
     return {"error": "Path is neither file nor directory"}
 
+def _text_url_result(content_type: str, content: bytes | bytearray) -> dict:
+    """Build the text analysis dict for a downloaded body."""
+    lines, words = _count_lines_words(content)
+    return {
+        "type": "text",
+        "content_type": content_type,
+        "lines": lines,
+        "words": words,
+        "size": len(content),
+        "preview": content[:2048].decode(errors="replace")[:500],
+    }
+
+
+def _binary_url_result(
+        content_type: str, content: bytes | bytearray) -> dict:
+    """Build the binary analysis dict for a downloaded body."""
+    return {
+        "type": "binary",
+        "content_type": content_type,
+        "size": len(content),
+        "preview_bytes": binascii.hexlify(
+            memoryview(content)[:32]).decode(),
+    }
+
+
 async def _analyze_url(url: str):
-    """Analyze a URL asynchronously for testing."""
+    """Analyze a URL. Single shared implementation behind the FastMCP
+    tool and the async wrappers."""
     if not is_safe_url(url):
+        logger.warning("Blocked unsafe URL: %s", url)
         return {"error": "URL not allowed for security reasons."}
-    max_url_size = 5 * 1024 * 1024
-    async def fetch():
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, follow_redirects=True)
-            content_length = int(resp.headers.get("content-length", 0))
-            if content_length > max_url_size:
-                return {"error": (
-                    "Remote file too large (>"
-                    f"{max_url_size // (1024*1024)} MB)"
-                )}
-            content_bytes = await resp.aread()
-            if len(content_bytes) > max_url_size:
-                return {"error": (
-                    "Downloaded file too large (>"
-                    f"{max_url_size // (1024*1024)} MB)"
-                )}
-            mime, _ = mimetypes.guess_type(url)
-            content_type = resp.headers.get("content-type", mime or "unknown")
-            if "text" in content_type:
-                try:
-                    text = content_bytes.decode(errors="replace")
-                except UnicodeDecodeError as exc:
-                    return {
-                        "error": f"Could not decode content as text: {exc}",
-                        "content_type": content_type,
-                        "size": len(content_bytes),
-                    }
-                return {
-                    "type": "text",
-                    "content_type": content_type,
-                    "lines": len(text.splitlines()),
-                    "words": len(text.split()),
-                    "size": len(content_bytes),
-                    "preview": text[:500],
-                }
-            return {
-                "type": "binary",
-                "content_type": content_type,
-                "size": len(content_bytes),
-                "preview_bytes": content_bytes[:32].hex(),
-            }
-    return await fetch()
+    try:
+        client = _get_client()
+        async with client.stream(
+            "GET", url, follow_redirects=True,
+            headers=_conditional_headers(url),
+        ) as resp:
+            if resp.status_code == 304 and url in _url_cache:
+                return _url_cache[url][2]
+            content_length = resp.headers.get("content-length")
+            if content_length and (
+                len(content_length) > _MAX_CL_DIGITS
+                or int(content_length) > _MAX_URL_SIZE
+            ):
+                return _ERR_REMOTE_TOO_LARGE
+            buf = bytearray()
+            async for chunk in resp.aiter_bytes(65536):
+                buf.extend(chunk)
+                if len(buf) > _MAX_URL_SIZE:
+                    return _ERR_DOWNLOAD_TOO_LARGE
+            headers = resp.headers
+        content_bytes = buf
+        mime, _ = mimetypes.guess_type(url)
+        content_type = headers.get("content-type", mime or "unknown")
+        if "text" in content_type:
+            result = _text_url_result(content_type, content_bytes)
+        else:
+            result = _binary_url_result(content_type, content_bytes)
+        _cache_url_result(url, headers, result)
+        return result
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.error("analyze_url: Exception fetching %s: %s", url, exc)
+        return {"error": f"Failed to fetch or analyze URL: {exc}"}
 
 async def analyze_url_async(url: str):
     """Public async wrapper for _analyze_url (for testing and external use)."""
@@ -313,4 +778,5 @@ __all__ = [
     'analyze_url_async',
     'analyze_path_async',
     'MAX_FILE_SIZE',
+    '_json_dumps',
 ]
@@ -0,0 +1,83 @@
+"""Shared pytest configuration: make the src layout importable once."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+_SRC = str(Path(__file__).resolve().parents[1] / 'src')
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
+
+from mcp_file_url_analyzer import server  # noqa: E402
+
+
+class _Resp:
+    """Mock httpx streaming response."""
+    __slots__ = ('headers', 'status_code', '_body')
+
+    def __init__(self, body, ctype, content_length):
+        if content_length is None:
+            content_length = len(body)
+        self.headers = {'content-type': ctype,
+                        'content-length': str(content_length)}
+        self.status_code = 200
+        self._body = body
+
+    async def __aenter__(self):
+        """Enter the streaming context manager (mocked)."""
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Exit the streaming context manager (mocked)."""
+
+    async def aiter_bytes(self, chunk_size=65536):
+        """Asynchronously yield the body in chunk_size pieces."""
+        body = self._body
+        for i in range(0, len(body), chunk_size):
+            yield body[i:i + chunk_size]
+
+
+class _Client:
+    """Mock httpx client serving one configured response."""
+    __slots__ = ('_resp', '_raise_exc')
+
+    def __init__(self, resp, raise_exc):
+        self._resp = resp
+        self._raise_exc = raise_exc
+
+    def stream(self, method, url, follow_redirects=True, timeout=10,
+               headers=None):
+        """Mock httpx streaming request."""
+        _ = method, url, follow_redirects, timeout, headers
+        if self._raise_exc is not None:
+            raise self._raise_exc
+        return self._resp
+
+
+@pytest.fixture
+def mock_httpx(monkeypatch):
+    """Patch server._get_client; returns a factory configuring the mock."""
+    def make(body=b'', ctype='text/plain', content_length=None,
+             raise_exc=None):
+        client = _Client(_Resp(body, ctype, content_length), raise_exc)
+        monkeypatch.setattr(server, '_get_client', lambda: client)
+        return client
+    return make
+
+
+@pytest.fixture(scope='session')
+def shared_tree(tmp_path_factory):
+    """Session-wide read-only tree: text, binary, oversized and broken link.
+
+    Tests using it must not modify the tree; write-time tests keep their
+    own function-scoped tmp_path.
+    """
+    root = tmp_path_factory.mktemp('shared_tree')
+    (root / 'a.txt').write_text('hello world')
+    (root / 'b.bin').write_bytes(b'\x00\x01\x02')
+    big = root / 'big.txt'
+    big.touch()
+    os.truncate(big, server.MAX_FILE_SIZE + 1)
+    (root / 'broken').symlink_to('/does/not/exist')
+    return root
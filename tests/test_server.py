@@ -1,15 +1,11 @@
 """Test suite for mcp-file-url-analyzer server tools."""
-import sys
 import os
 import asyncio
 import warnings
 import pytest
 
-sys.path.insert(0, os.path.abspath(
-    os.path.join(os.path.dirname(__file__), '..', 'src')))
 from mcp_file_url_analyzer import server
 
-@pytest.mark.asyncio
 async def test_handle_list_resources_empty():
     """Test that listing resources returns an empty list."""
     resources = await server.handle_list_resources()
@@ -17,7 +13,6 @@ async def test_handle_list_resources_empty():
     assert len(resources) == 0
 
 
-@pytest.mark.asyncio
 async def test_handle_list_tools():
     """Test that the list of tools includes 'analyze-path' and 'analyze-url'."""
     tools = await server.handle_list_tools()
@@ -26,7 +21,6 @@ async def test_handle_list_tools():
     assert 'analyze-url' in tool_names
 
 
-@pytest.mark.asyncio
 async def test_analyze_path_file(tmp_path):
     """Test analyzing a text file returns correct summary info."""
     file_path = tmp_path / 'test.txt'
@@ -38,17 +32,13 @@ async def test_analyze_path_file(tmp_path):
     assert 'hello' in data['preview']
 
 
-@pytest.mark.asyncio
-async def test_analyze_path_too_large(tmp_path):
+async def test_analyze_path_too_large(shared_tree):
     """Test that analyzing a file larger than the limit returns an error."""
-    file_path = tmp_path / 'big.txt'
-    file_path.write_bytes(b'a' * (server.MAX_FILE_SIZE + 1))
-    result = await server.analyze_path_async(str(file_path))
+    result = await server.analyze_path_async(str(shared_tree / 'big.txt'))
     data = result.model_dump() if hasattr(result, 'model_dump') else result
     assert 'too large' in data['error']
 
 
-@pytest.mark.asyncio
 @pytest.mark.parametrize("url,expected", [
     ("http://localhost", False),
     ("http://127.0.0.1", False),
@@ -57,6 +47,8 @@ async def test_analyze_path_too_large(tmp_path):
     ("http://example.com", True),
     ("https://www.rstic.es/", True),
     ("http://[::1]", False),
+    ("http://[fe80::1]", False),
+    ("http://169.254.169.254", False),
     ("http://8.8.8.8", True),
     ("not-a-url", False),
 ])
@@ -66,7 +58,14 @@ async def test_is_safe_url(url, expected):
     assert server.is_safe_url(url) is expected
 
 
-@pytest.mark.asyncio
+async def test_is_safe_url_cached():
+    """Test that repeated safety checks for one URL hit the cache."""
+    server.is_safe_url.cache_clear()
+    assert server.is_safe_url('http://example.org/cached') is True
+    assert server.is_safe_url('http://example.org/cached') is True
+    assert server.is_safe_url.cache_info().hits > 0
+
+
 async def test_handle_read_resource_invalid_uri():
     """Test that reading a resource with an invalid URI raises ValueError."""
     with pytest.raises(ValueError) as exc:
@@ -74,7 +73,6 @@ async def test_handle_read_resource_invalid_uri():
     assert 'Unsupported URI' in str(exc.value)
 
 
-@pytest.mark.asyncio
 async def test_handle_get_prompt_invalid():
     """Test that requesting an unknown prompt raises ValueError."""
     with pytest.raises(ValueError) as exc:
@@ -82,7 +80,6 @@ async def test_handle_get_prompt_invalid():
     assert 'Unknown prompt' in str(exc.value)
 
 
-@pytest.mark.asyncio
 async def test_handle_call_tool_invalid_tool():
     """Test that calling an unknown tool raises ValueError."""
     with pytest.raises(ValueError) as exc:
@@ -90,14 +87,12 @@ async def test_handle_call_tool_invalid_tool():
     assert 'Unknown tool' in str(exc.value)
 
 
-@pytest.mark.asyncio
 async def test_analyze_url_invalid():
     """Test that analyze_url rejects unsafe URLs."""
     result = await server.analyze_url_async('http://localhost')
     assert 'security' in result['error'].lower()
 
 
-@pytest.mark.asyncio
 async def test_analyze_path_not_found():
     """Test that analyzing a non-existent file returns an error."""
     result = await server.analyze_path_async('/path/does/not/exist.txt')
@@ -105,12 +100,9 @@ async def test_analyze_path_not_found():
     assert 'not found' in data['error'].lower()
 
 
-@pytest.mark.asyncio
-async def test_analyze_path_not_file_nor_dir(tmp_path):
+async def test_analyze_path_not_file_nor_dir(shared_tree):
     """Test that analyzing a broken symlink returns an error."""
-    broken = tmp_path / 'broken'
-    broken.symlink_to('/does/not/exist')
-    result = await server.analyze_path_async(str(broken))
+    result = await server.analyze_path_async(str(shared_tree / 'broken'))
     data = result.model_dump() if hasattr(result, 'model_dump') else result
     assert (
         'neither file nor directory' in data['error'].lower()
@@ -118,14 +110,11 @@ async def test_analyze_path_not_file_nor_dir(tmp_path):
     )
 
 
-@pytest.mark.asyncio
-async def test_analyze_path_directory(tmp_path):
+async def test_analyze_path_directory(shared_tree):
     """Test analyzing a directory with text and binary files returns correct results."""
-    file1 = tmp_path / 'a.txt'
-    file2 = tmp_path / 'b.bin'
-    file1.write_text('hello world')
-    file2.write_bytes(b'\x00\x01\x02')
-    result = await server.analyze_path_async(str(tmp_path))
+    file1 = shared_tree / 'a.txt'
+    file2 = shared_tree / 'b.bin'
+    result = await server.analyze_path_async(str(shared_tree))
     data = result.model_dump() if hasattr(result, 'model_dump') else result
     files = data['files']
     assert str(file1) in files
@@ -136,114 +125,57 @@ async def test_analyze_path_directory(tmp_path):
     assert files[str(file2)]['type'] == 'binary'
 
 
-@pytest.mark.asyncio
-async def test_analyze_url_text(monkeypatch):
-    """Test analyze_url returns correct summary for a text response (mocked)."""
-    class MockResponse:
-        """Mock HTTPX response for text content."""
-
-        def __init__(self):
-            """Initialize mock response with headers."""
-            self.headers = {'content-type': 'text/plain',
-                            'content-length': '11'}
-
-        async def aread(self):
-            """Asynchronously read the response content (mocked)."""
-            return b'hello world'
-
-    class MockClient:
-        """Mock HTTPX client for text response."""
+async def test_analyze_path_no_extension(tmp_path):
+    """Test that extensionless files are classified by content sniffing."""
+    text_file = tmp_path / 'README'
+    text_file.write_text('plain text with no extension')
+    blob_file = tmp_path / 'blob'
+    blob_file.write_bytes(b'\x00\x01\x02\x03' * 16)
+    result = await server.analyze_path_async(str(tmp_path))
+    data = result.model_dump() if hasattr(result, 'model_dump') else result
+    files = data['files']
+    assert files[str(text_file)]['type'] == 'text'
+    assert files[str(blob_file)]['type'] == 'binary'
 
-        async def __aenter__(self):
-            """Enter the async context manager (mocked)."""
-            return self
 
-        async def __aexit__(self, exc_type, exc, tb):
-            """Exit the async context manager (mocked)."""
+@pytest.mark.parametrize("n_files", [1, 50, 500])
+async def test_analyze_path_directory_many_files(tmp_path, n_files):
+    """Test that directory scans return a result for every file."""
+    for i in range(n_files):
+        (tmp_path / f'file{i}.txt').write_text(f'content {i}')
+    result = await server.analyze_path_async(str(tmp_path))
+    data = result.model_dump() if hasattr(result, 'model_dump') else result
+    files = data['files']
+    assert len(files) == n_files
+    for info in files.values():
+        assert info['type'] == 'text'
 
-        async def get(self, url, follow_redirects=True):
-            """Mock HTTPX GET request."""
-            _ = url, follow_redirects
-            return MockResponse()
 
-    monkeypatch.setattr(server.httpx, 'AsyncClient', MockClient)
+async def test_analyze_url_text(mock_httpx):
+    """Test analyze_url returns correct summary for a text response (mocked)."""
+    mock_httpx(body=b'hello world', ctype='text/plain')
     result = await server.analyze_url_async('http://example.com/file.txt')
     assert result['type'] == 'text'
     assert 'hello' in result['preview']
 
 
-@pytest.mark.asyncio
-async def test_analyze_url_binary(monkeypatch):
+async def test_analyze_url_binary(mock_httpx):
     """Test analyze_url returns correct summary for a binary response (mocked)."""
-    class MockResponse:
-        """Mock HTTPX response for binary content."""
-
-        def __init__(self):
-            """Initialize mock response with headers."""
-            self.headers = {
-                'content-type': 'application/octet-stream', 'content-length': '4'}
-
-        async def aread(self):
-            """Asynchronously read the response content (mocked)."""
-            return b'\x00\x01\x02\x03'
-
-    class MockClient:
-        """Mock HTTPX client for binary response."""
-
-        async def __aenter__(self):
-            """Enter the async context manager (mocked)."""
-            return self
-
-        async def __aexit__(self, exc_type, exc, tb):
-            """Exit the async context manager (mocked)."""
-
-        async def get(self, url, follow_redirects=True):
-            """Mock HTTPX GET request."""
-            _ = url, follow_redirects
-            return MockResponse()
-
-    monkeypatch.setattr(server.httpx, 'AsyncClient', MockClient)
+    mock_httpx(body=b'\x00\x01\x02\x03', ctype='application/octet-stream')
     result = await server.analyze_url_async('http://example.com/file.bin')
     assert result['type'] == 'binary'
     assert 'preview_bytes' in result
 
 
-@pytest.mark.asyncio
-async def test_analyze_url_too_large(monkeypatch):
+async def test_analyze_url_too_large(mock_httpx):
     """Test that analyze_url returns an error for responses exceeding the size limit (mocked)."""
-    class MockResponse:
-        """Mock HTTPX response for too large content."""
-
-        def __init__(self):
-            """Initialize mock response with headers."""
-            self.headers = {'content-type': 'text/plain',
-                            'content-length': str(6 * 1024 * 1024)}
-
-        async def aread(self):
-            """Asynchronously read the response content (mocked)."""
-            return b'a' * (6 * 1024 * 1024)
-
-    class MockClient:
-        """Mock HTTPX client for too large content."""
-
-        async def __aenter__(self):
-            """Enter the async context manager (mocked)."""
-            return self
-
-        async def __aexit__(self, exc_type, exc, tb):
-            """Exit the async context manager (mocked)."""
-
-        async def get(self, url, follow_redirects=True):
-            """Mock HTTPX GET request."""
-            _ = url, follow_redirects
-            return MockResponse()
-
-    monkeypatch.setattr(server.httpx, 'AsyncClient', MockClient)
+    # Advertise an oversized Content-Length; the body is never pulled.
+    mock_httpx(body=b'', ctype='text/plain',
+               content_length=6 * 1024 * 1024)
     result = await server.analyze_url_async('http://example.com/huge.txt')
     assert 'too large' in result['error'].lower()
 
 
-@pytest.mark.asyncio
 async def test_analyze_url_real():
     """Integration: analyze a real public URL (https://www.rstic.es/)"""
     # Only run if network is available
@@ -256,7 +188,6 @@ async def test_analyze_url_real():
     assert 'type' in result or 'error' in result
 
 
-@pytest.mark.asyncio
 async def test_analyze_path_env_limit(tmp_path, monkeypatch):
     """Test analyze_path with MAX_FILE_SIZE set by environment variable."""
     monkeypatch.setenv("MAX_FILE_SIZE", str(1024))
@@ -275,24 +206,9 @@ async def test_analyze_path_env_limit(tmp_path, monkeypatch):
         )
 
 
-@pytest.mark.asyncio
-async def test_analyze_url_timeout(monkeypatch):
+async def test_analyze_url_timeout(mock_httpx):
     """Test analyze_url handles timeout gracefully."""
-    # SlowResponse is not used, removed to fix Pylint unused variable warning
-    class SlowClient:
-        """Mock HTTPX client that simulates a timeout."""
-
-        async def __aenter__(self):
-            """Enter the async context manager (mocked)."""
-            return self
-
-        async def __aexit__(self, exc_type, exc, tb):
-            """Exit the async context manager (mocked)."""
-
-        async def get(self, url, follow_redirects=True, timeout=10):
-            """Mock HTTPX GET request that simulates a timeout."""
-            raise server.httpx.TimeoutException("Timeout!")
-    monkeypatch.setattr(server.httpx, 'AsyncClient', SlowClient)
+    mock_httpx(raise_exc=server.httpx.TimeoutException("Timeout!"))
     try:
         # Use the public handler to ensure error is caught and returned as dict
         result = server.analyze_url({'url': 'http://example.com/slow'})